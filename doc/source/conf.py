@@ -1,20 +1,30 @@
+import os
+
 # -- General configuration ----------------------------------------------------
 
 # Add any Sphinx extension module names here, as strings. They can be
 # extensions coming with Sphinx (named 'sphinx.ext.*') or your custom ones.
 extensions = [
     'sphinxcontrib.apidoc',
+    'sphinx.ext.duration',
     'sphinx.ext.viewcode',
     'openstackdocstheme',
     'cliff.sphinxext'
 ]
 
+# Set FAST_DOCS=1 to skip regenerating the API reference, e.g. when only
+# editing prose pages locally. Pages generated by a previous full build in
+# reference/api are still used.
+if os.environ.get('FAST_DOCS'):
+    extensions.remove('sphinxcontrib.apidoc')
+
 # sphinxcontrib.apidoc options
 apidoc_module_dir = '../../ironic_inspector_client'
 apidoc_output_dir = 'reference/api'
 apidoc_excluded_paths = [
     'tests',
     'common/i18n*',
+    'common/jsonutils*',
     'shell*'
 ]
 apidoc_separate_modules = True
@@ -11,9 +11,40 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .v1 import ClientV1, DEFAULT_API_VERSION, MAX_API_VERSION  # noqa
-from .common.http import ClientError, EndpointNotFound, VersionNotSupported  # noqa
+import importlib
 
 
 __all__ = ['ClientV1', 'DEFAULT_API_VERSION', 'MAX_API_VERSION',
-           'ClientError', 'EndpointNotFound', 'VersionNotSupported']
+           'ClientError', 'EndpointNotFound', 'VersionNotSupported',
+           'clear_version_cache']
+
+
+def __getattr__(name):
+    # The public names are resolved on first access, so that importing a
+    # submodule (e.g. from the CLI plugin) does not load the whole HTTP stack.
+    modules = {
+        'ClientV1': '.v1',
+        'DEFAULT_API_VERSION': '.v1',
+        'MAX_API_VERSION': '.v1',
+        'ClientError': '.common.http',
+        'EndpointNotFound': '.common.http',
+        'VersionNotSupported': '.common.http',
+        'clear_version_cache': '.common.http',
+    }
+    try:
+        module = modules[name]
+    except KeyError:
+        if name in ('common', 'resource', 'shell', 'v1', 'version'):
+            # Submodules stay reachable without an explicit import;
+            # importing one also sets it as an attribute of this package.
+            return importlib.import_module('.' + name, __name__)
+        raise AttributeError('module %r has no attribute %r'
+                             % (__name__, name))
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -13,14 +13,18 @@
 
 """Generic code for inspector client."""
 
-import json
+import functools
 import logging
+import re
+import threading
+import time
 
 from keystoneauth1 import exceptions as ks_exc
 from keystoneauth1 import session as ks_session
 import requests
 
 from ironic_inspector_client.common.i18n import _
+from ironic_inspector_client.common import jsonutils
 
 
 _ERROR_ENCODING = 'utf-8'
@@ -32,50 +36,122 @@ _MAX_VERSION_HEADER = 'X-OpenStack-Ironic-Inspector-API-Maximum-Version'
 _VERSION_HEADER = 'X-OpenStack-Ironic-Inspector-API-Version'
 _AUTH_TOKEN_HEADER = 'X-Auth-Token'
 
+# Messages for errors raised while validating API versions, translated once
+_MALFORMED_VERSION_MSG = _("Malformed API version: expect tuple, string "
+                           "in form of X.Y or integer")
+_VERSION_NOT_INT_MSG = _("All API version components should be integers")
+_VERSION_LENGTH_MSG = _("API version should be of length 1 or 2")
+_VERSION_NOT_SUPPORTED_MSG = _('Version %(expected)s is not supported by the '
+                               'server, supported range is %(supported)s')
 
+_BASE_API_VERSION = (1, 0)
+"""API version supported by every server, no need to check for it."""
+
+_VERSION_CACHE_TTL = 300
+"""Time (in seconds) to cache the API versions supported by a server."""
+
+_VERSION_CACHE = {}
+_VERSION_CACHE_LOCK = threading.Lock()
+
+_DEFAULT_SESSION = None
+_DEFAULT_SESSION_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=16)
+def _versioned_url(base_url, major):
+    """Append the /v<MAJOR> postfix to a URL unless it is already there."""
+    base_url = base_url.rstrip('/')
+    ver_postfix = '/v%d' % major
+    if not base_url.endswith(ver_postfix):
+        base_url += ver_postfix
+    return base_url
+
+
+def clear_version_cache():
+    """Forget the API versions supported by servers.
+
+    Use it when a server is known to have been upgraded or downgraded, so
+    that the next client does not rely on the cached version range.
+    """
+    with _VERSION_CACHE_LOCK:
+        _VERSION_CACHE.clear()
+
+
+def _get_default_session():
+    """Get a session without authentication shared by all clients.
+
+    Sharing the session lets clients created without an explicit session
+    reuse pooled keep-alive connections instead of opening new ones.
+    """
+    global _DEFAULT_SESSION
+    if _DEFAULT_SESSION is None:
+        with _DEFAULT_SESSION_LOCK:
+            if _DEFAULT_SESSION is None:
+                _DEFAULT_SESSION = ks_session.Session(None)
+    return _DEFAULT_SESSION
+
+
+# Surrounding whitespace is tolerated, like int() and float() do
+_VERSION_RE = re.compile(r'\s*(\d+)(?:\.(\d+))?\s*', re.ASCII)
+
+
+@functools.lru_cache(maxsize=32)
 def _parse_version(api_version):
     try:
-        return tuple(int(x) for x in api_version.split('.'))
-    except (ValueError, TypeError):
-        raise ValueError(_("Malformed API version: expect tuple, string "
-                           "in form of X.Y or integer"))
+        match = _VERSION_RE.fullmatch(api_version)
+    except TypeError:
+        match = None
+    if match is None:
+        raise ValueError(_MALFORMED_VERSION_MSG)
+    major, minor = match.groups()
+    return (int(major), int(minor or 0))
 
 
 class ClientError(requests.HTTPError):
     """Error returned from a server."""
     def __init__(self, response):
         # inspector returns error message in body
-        msg = response.content.decode(_ERROR_ENCODING)
+        msg = self._parse_message(response)
+        LOG.debug('Inspector returned error "%(msg)s" (HTTP %(code)s)',
+                  {'msg': msg, 'code': response.status_code})
+        super(ClientError, self).__init__(msg, response=response)
+
+    @staticmethod
+    def _parse_message(response):
+        content = response.content
+        if not content:
+            # Nothing to parse, e.g. an error from a proxy with no body
+            return response.reason or str(response.status_code)
+
         try:
-            msg = json.loads(msg)
+            msg = jsonutils.loads(content)
         except ValueError:
             LOG.debug('Old style error response returned, assuming '
                       'ironic-discoverd')
+            return content.decode(_ERROR_ENCODING, errors='replace')
         except TypeError:
             LOG.exception('Bad error response from Ironic Inspector')
-        else:
-            try:
-                msg = msg['error']['message']
-            except KeyError as exc:
-                LOG.error('Invalid error response from Ironic Inspector: '
-                          '%(msg)s (missing key %(key)s)',
-                          {'msg': msg, 'key': exc})
-                # It's surprisingly common to try accessing ironic URL with
-                # ironic-inspector-client, handle this case
-                try:
-                    msg = msg['error_message']
-                except KeyError:
-                    pass
-                else:
-                    msg = _('Received Ironic-style response %s. Are you '
-                            'trying to access Ironic URL instead of Ironic '
-                            'Inspector?') % msg
-            except TypeError:
-                LOG.exception('Bad error response from Ironic Inspector')
+            return content.decode(_ERROR_ENCODING, errors='replace')
 
-        LOG.debug('Inspector returned error "%(msg)s" (HTTP %(code)s)',
-                  {'msg': msg, 'code': response.status_code})
-        super(ClientError, self).__init__(msg, response=response)
+        try:
+            return msg['error']['message']
+        except KeyError as exc:
+            LOG.error('Invalid error response from Ironic Inspector: '
+                      '%(msg)s (missing key %(key)s)',
+                      {'msg': msg, 'key': exc})
+            # It's surprisingly common to try accessing ironic URL with
+            # ironic-inspector-client, handle this case
+            try:
+                ironic_msg = msg['error_message']
+            except KeyError:
+                return msg
+            else:
+                return _('Received Ironic-style response %s. Are you '
+                         'trying to access Ironic URL instead of Ironic '
+                         'Inspector?') % ironic_msg
+        except TypeError:
+            LOG.exception('Bad error response from Ironic Inspector')
+            return msg
 
     @classmethod
     def raise_if_needed(cls, response):
@@ -92,8 +168,7 @@ class VersionNotSupported(Exception):
         supported versions.
     """
     def __init__(self, expected, supported):
-        msg = (_('Version %(expected)s is not supported by the server, '
-                 'supported range is %(supported)s') %
+        msg = (_VERSION_NOT_SUPPORTED_MSG %
                {'expected': expected,
                 'supported': ' to '.join(str(x) for x in supported)})
         self.expected_version = expected
@@ -126,10 +201,10 @@ class BaseClient(object):
                             the server
         :param inspector_url: *Ironic Inspector* URL in form:
             http://host:port[/ver]. When session is provided, defaults to
-            service URL from the catalog. As a last resort
-            defaults to ``http://<current host>:5050/v<MAJOR>``.
+            service URL from the catalog.
         :param session: existing keystone session. A session without
-            authentication is created if this is set to None.
+            authentication, shared between clients, is used if this is set
+            to None.
         :param service_type: service type to use when looking up the URL
         :param interface: interface type (public, internal, etc) to use when
             looking up the URL
@@ -141,7 +216,7 @@ class BaseClient(object):
         self._base_url = inspector_url
 
         if session is None:
-            self._session = ks_session.Session(None)
+            self._session = _get_default_session()
         else:
             self._session = session
             if not inspector_url:
@@ -168,27 +243,39 @@ class BaseClient(object):
         self._base_url = self._base_url.rstrip('/')
         self._api_version = self._check_api_version(api_version)
         self._version_str = '%d.%d' % self._api_version
-        ver_postfix = '/v%d' % self._api_version[0]
-
-        if not self._base_url.endswith(ver_postfix):
-            self._base_url += ver_postfix
+        self._base_headers = {_VERSION_HEADER: self._version_str}
+        self._base_url = _versioned_url(self._base_url, self._api_version[0])
+        self._url_prefix = self._base_url + '/'
 
     def _add_headers(self, headers):
-        headers[_VERSION_HEADER] = self._version_str
+        # Always return a new dict, so that neither the caller's headers nor
+        # the precomputed ones are modified by the session.
+        if not headers:
+            return self._base_headers.copy()
+        headers = dict(headers)
+        headers.update(self._base_headers)
         return headers
 
     def _check_api_version(self, api_version):
         if isinstance(api_version, int):
             api_version = (api_version, 0)
-        if isinstance(api_version, str):
+        elif isinstance(api_version, str):
             api_version = _parse_version(api_version)
-        api_version = tuple(api_version)
-        if not all(isinstance(x, int) for x in api_version):
-            raise TypeError(_("All API version components should be integers"))
-        if len(api_version) == 1:
-            api_version += (0,)
-        elif len(api_version) > 2:
-            raise ValueError(_("API version should be of length 1 or 2"))
+        else:
+            # Integers and parsed strings are already valid (X, Y) tuples,
+            # only explicitly passed sequences need validation.
+            if not isinstance(api_version, tuple):
+                api_version = tuple(api_version)
+            if len(api_version) == 1:
+                api_version += (0,)
+            elif len(api_version) != 2:
+                raise ValueError(_VERSION_LENGTH_MSG)
+            if not (isinstance(api_version[0], int)
+                    and isinstance(api_version[1], int)):
+                raise TypeError(_VERSION_NOT_INT_MSG)
+
+        if api_version == _BASE_API_VERSION:
+            return api_version
 
         minv, maxv = self.server_api_versions()
         if api_version < minv or api_version > maxv:
@@ -203,30 +290,44 @@ class BaseClient(object):
         :param endpoint: relative endpoint
         :param kwargs: arguments to pass to 'requests' library
         """
-        headers = self._add_headers(kwargs.pop('headers', {}))
-        url = self._base_url + '/' + url.lstrip('/')
-        LOG.debug('Requesting %(method)s %(url)s (API version %(ver)s) '
-                  'with %(args)s',
-                  {'method': method.upper(), 'url': url,
-                   'ver': self._version_str, 'args': kwargs})
+        headers = self._add_headers(kwargs.pop('headers', None))
+        url = self._url_prefix + url.lstrip('/')
+        debug = LOG.isEnabledFor(logging.DEBUG)
+        if debug:
+            LOG.debug('Requesting %(method)s %(url)s (API version %(ver)s) '
+                      'with %(args)s',
+                      {'method': method.upper(), 'url': url,
+                       'ver': self._version_str, 'args': kwargs})
         res = self._session.request(url, method, headers=headers,
                                     raise_exc=False, **kwargs)
-        LOG.debug('Got response for %(method)s %(url)s with status code '
-                  '%(code)s', {'url': url, 'method': method.upper(),
-                               'code': res.status_code})
+        if debug:
+            LOG.debug('Got response for %(method)s %(url)s with status code '
+                      '%(code)s', {'url': url, 'method': method.upper(),
+                                   'code': res.status_code})
         ClientError.raise_if_needed(res)
         return res
 
     def server_api_versions(self):
         """Get minimum and maximum supported API versions from a server.
 
+        The result is cached per URL for ``_VERSION_CACHE_TTL`` seconds.
+
         :return: tuple (minimum version, maximum version) each version
                  is returned as a tuple (X, Y)
         :raises: *requests* library exception on connection problems.
         :raises: ValueError if returned version cannot be parsed
         """
-        res = self._session.get(self._base_url, authenticated=False,
-                                raise_exc=False)
+        # The constructor probes the server before the version postfix is
+        # added to the URL, so normalize the key to share the cache entry.
+        cache_key = _versioned_url(self._base_url, _BASE_API_VERSION[0])
+        with _VERSION_CACHE_LOCK:
+            cached = _VERSION_CACHE.get(cache_key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        # Only the headers are needed, so do not transfer the body
+        res = self._session.head(self._base_url, authenticated=False,
+                                 raise_exc=False)
         # HTTP Not Found is a valid response for older (2.0.0) servers
         if res.status_code >= 400 and res.status_code != 404:
             ClientError.raise_if_needed(res)
@@ -237,4 +338,7 @@ class BaseClient(object):
         LOG.debug('Supported API version range for %(url)s is '
                   '[%(min)s, %(max)s]',
                   {'url': self._base_url, 'min': min_ver, 'max': max_ver})
+        with _VERSION_CACHE_LOCK:
+            _VERSION_CACHE[cache_key] = (
+                time.monotonic() + _VERSION_CACHE_TTL, res)
         return res
@@ -0,0 +1,35 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""JSON helpers, using orjson if it is installed.
+
+orjson does not support integers wider than 64 bits and parses them as
+floats, so only use these helpers for documents where this cannot matter,
+such as error messages.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    """Deserialize JSON from a string or bytes."""
+    if orjson is not None:
+        # orjson.JSONDecodeError is a subclass of ValueError, like the
+        # exception raised by the standard library.
+        return orjson.loads(data)
+    return json.loads(data)
@@ -21,6 +21,8 @@ class InterfaceResource(object):
     field consists of a 'field_id' (key) and a 'label' (value).
     """
 
+    __slots__ = ('_fields', '_labels')
+
     FIELDS = {
         'interface': 'Interface',
         'mac': 'MAC Address',
@@ -83,7 +85,8 @@ class InterfaceResource(object):
             field_ids = sorted(self.FIELDS.keys())
 
         self._fields = tuple(field_ids)
-        self._labels = tuple(self.FIELDS[x] for x in field_ids)
+        # Only needed when the resource is displayed, built on first access
+        self._labels = None
 
     @property
     def fields(self):
@@ -93,6 +96,8 @@ class InterfaceResource(object):
     @property
     def labels(self):
         """List of labels for fields displayed for this resource."""
+        if self._labels is None:
+            self._labels = tuple(self.FIELDS[x] for x in self._fields)
         return self._labels
 
 
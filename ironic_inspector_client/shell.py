@@ -13,6 +13,9 @@
 
 """OpenStackClient plugin for Ironic Inspector."""
 
+from concurrent import futures
+import contextlib
+import functools
 import json
 import os
 import sys
@@ -24,18 +27,38 @@ import yaml
 
 import ironic_inspector_client
 from ironic_inspector_client.common.i18n import _
-from ironic_inspector_client import resource as res
 
 
 API_NAME = 'baremetal_introspection'
 API_VERSION_OPTION = 'inspector_api_version'
 DEFAULT_API_VERSION = '1'
-API_VERSIONS = {
-    "1": "ironic_inspector.shell",
-}
+# Matches the default connection pool size of a session
+_MAX_WORKERS = 10
+# The LibYAML based loader is much faster, but is not always available
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
-for mversion in range(ironic_inspector_client.MAX_API_VERSION[1] + 1):
-    API_VERSIONS["1.%d" % mversion] = API_VERSIONS["1"]
+
+def __getattr__(name):
+    # API_VERSIONS depends on MAX_API_VERSION, which requires importing the
+    # whole client library, so only build it when it is actually used.
+    if name != 'API_VERSIONS':
+        raise AttributeError('module %r has no attribute %r'
+                             % (__name__, name))
+
+    max_minor = ironic_inspector_client.MAX_API_VERSION[1]
+    versions = dict.fromkeys(
+        ["1"] + [f"1.{mversion}" for mversion in range(max_minor + 1)],
+        "ironic_inspector.shell")
+    globals()[name] = versions
+    return versions
+
+
+@functools.lru_cache(maxsize=1)
+def _interface_field_choices():
+    """Get all known interface field names, sorted, for use in parsers."""
+    from ironic_inspector_client import resource as res
+
+    return tuple(sorted(res.InterfaceResource.FIELDS))
 
 
 def make_client(instance):
@@ -94,22 +117,25 @@ class StartCommand(lister.Lister):
                 _("--check-errors can only be used with --wait"))
 
         client = self.app.client_manager.baremetal_introspection
-        for uuid in parsed_args.node:
-            client.introspect(uuid)
+        nodes = parsed_args.node
+        with futures.ThreadPoolExecutor(
+                max_workers=min(_MAX_WORKERS, len(nodes))) as executor:
+            # Re-raises the first failure once all requests are done
+            for _result in executor.map(client.introspect, nodes):
+                pass
 
         if parsed_args.wait:
-            print('Waiting for introspection to finish...', file=sys.stderr)
-            result = client.wait_for_finish(parsed_args.node)
-            result = [(uuid, s.get('error'))
-                      for uuid, s in result.items()]
+            sys.stderr.write('Waiting for introspection to finish...\n')
+            statuses = client.wait_for_finish(parsed_args.node)
             if parsed_args.check_errors:
-                uuids_errors = "\n".join("%s (%s)" % node_info
-                                         for node_info in result
-                                         if node_info[1] is not None)
+                uuids_errors = "\n".join("%s (%s)" % (uuid, s['error'])
+                                         for uuid, s in statuses.items()
+                                         if s.get('error') is not None)
                 if uuids_errors:
                     raise Exception(
                         _("Introspection failed for some nodes: %s")
                         % uuids_errors)
+            result = ((uuid, s.get('error')) for uuid, s in statuses.items())
         else:
             result = []
 
@@ -131,7 +157,7 @@ class ReprocessCommand(command.Command):
 
 class StatusCommand(show.ShowOne):
     """Get introspection status."""
-    hidden_status_items = {'links'}
+    hidden_status_items = frozenset({'links'})
 
     @classmethod
     def status_attributes(cls, client_item):
@@ -153,15 +179,19 @@ class StatusCommand(show.ShowOne):
     def take_action(self, parsed_args):
         client = self.app.client_manager.baremetal_introspection
         status = client.get_status(parsed_args.node)
-        return zip(*sorted(self.status_attributes(status)))
+        items = sorted(self.status_attributes(status))
+        return (tuple(name for name, _value in items),
+                tuple(value for _name, value in items))
 
 
 class StatusListCommand(lister.Lister):
     """List introspection statuses"""
 
     COLUMNS = ('UUID', 'Started at', 'Finished at', 'Error')
-    MAPPING = dict(zip(COLUMNS,
-                       ['uuid', 'started_at', 'finished_at', 'error']))
+    # None of these are in StatusCommand.hidden_status_items, so they can be
+    # read from status items directly
+    _KEYS = ('uuid', 'started_at', 'finished_at', 'error')
+    MAPPING = dict(zip(COLUMNS, _KEYS))
 
     @classmethod
     def status_row(cls, client_item):
@@ -173,8 +203,7 @@ class StatusListCommand(lister.Lister):
                             list_statuses client method.
         :return: a list of client_item attributes as the row
         """
-        status = dict(StatusCommand.status_attributes(client_item))
-        return tuple(status.get(cls.MAPPING[item]) for item in cls.COLUMNS)
+        return tuple(client_item.get(key) for key in cls._KEYS)
 
     def get_parser(self, prog_name):
         parser = super(StatusListCommand, self).get_parser(prog_name)
@@ -188,7 +217,7 @@ class StatusListCommand(lister.Lister):
         client = self.app.client_manager.baremetal_introspection
         statuses = client.list_statuses(marker=parsed_args.marker,
                                         limit=parsed_args.limit)
-        rows = [self.status_row(status) for status in statuses]
+        rows = (self.status_row(status) for status in statuses)
         return self.COLUMNS, rows
 
 
@@ -209,24 +238,34 @@ class RuleImportCommand(lister.Lister):
     """Import one or several introspection rules from a JSON/YAML file."""
 
     COLUMNS = ("UUID", "Description")
+    _KEYS = tuple(col.lower() for col in COLUMNS)
 
     def get_parser(self, prog_name):
         parser = super(RuleImportCommand, self).get_parser(prog_name)
         parser.add_argument('file', help='JSON or YAML file to import, may '
-                            'contain one or several rules')
+                            'contain one or several rules; use "-" to read '
+                            'from the standard input')
         return parser
 
     def take_action(self, parsed_args):
-        with open(parsed_args.file, 'r') as fp:
-            rules = yaml.safe_load(fp)
-            if not isinstance(rules, list):
-                rules = [rules]
+        if parsed_args.file == '-':
+            content = sys.stdin.buffer.read()
+        else:
+            with open(parsed_args.file, 'rb') as fp:
+                content = fp.read()
+        # Most rule files are JSON, which is much faster to parse as such.
+        # The standard library is used so that large integers stay intact.
+        try:
+            rules = json.loads(content)
+        except ValueError:
+            rules = yaml.load(content, Loader=_YAML_LOADER)
+        if not isinstance(rules, list):
+            rules = [rules]
         client = self.app.client_manager.baremetal_introspection
         result = []
         for rule in rules:
-            result.append(client.rules.from_json(rule))
-        result = [tuple(rule.get(col.lower()) for col in self.COLUMNS)
-                  for rule in result]
+            created = client.rules.from_json(rule)
+            result.append(tuple(created.get(key) for key in self._KEYS))
         return self.COLUMNS, result
 
 
@@ -234,11 +273,12 @@ class RuleListCommand(lister.Lister):
     """List all introspection rules."""
 
     COLUMNS = ("UUID", "Description")
+    _KEYS = tuple(col.lower() for col in COLUMNS)
 
     def take_action(self, parsed_args):
         client = self.app.client_manager.baremetal_introspection
         rules = client.rules.get_all()
-        rules = [tuple(rule.get(col.lower()) for col in self.COLUMNS)
+        rules = [tuple(rule.get(key) for key in self._KEYS)
                  for rule in rules]
         return self.COLUMNS, rules
 
@@ -294,13 +334,17 @@ class DataSaveCommand(command.Command):
 
     def take_action(self, parsed_args):
         client = self.app.client_manager.baremetal_introspection
-        data = client.get_data(parsed_args.node,
-                               raw=bool(parsed_args.file),
-                               processed=not parsed_args.unprocessed)
         if parsed_args.file:
-            with open(parsed_args.file, 'wb') as fp:
-                fp.write(data)
+            data = client.get_data(parsed_args.node, raw=True,
+                                   processed=not parsed_args.unprocessed,
+                                   stream=True)
+            with contextlib.closing(data), \
+                    open(parsed_args.file, 'wb') as fp:
+                for chunk in data:
+                    fp.write(chunk)
         else:
+            data = client.get_data(parsed_args.node, raw=False,
+                                   processed=not parsed_args.unprocessed)
             json.dump(data, sys.stdout)
 
 
@@ -323,13 +367,14 @@ class InterfaceListCommand(lister.Lister):
         display_group.add_argument(
             '--fields', nargs='+', dest='fields',
             metavar='<field>',
-            choices=sorted(res.InterfaceResource(detailed=True).fields),
+            choices=_interface_field_choices(),
             help="Display one or more fields.  "
             "Can not be used when '--long' is specified")
 
         return parser
 
     def take_action(self, parsed_args):
+        from ironic_inspector_client import resource as res
 
         client = self.app.client_manager.baremetal_introspection
 
@@ -356,12 +401,13 @@ class InterfaceShowCommand(show.ShowOne):
         parser.add_argument(
             '--fields', nargs='+', dest='fields',
             metavar='<field>',
-            choices=sorted(res.InterfaceResource(detailed=True).fields),
+            choices=_interface_field_choices(),
             help="Display one or more fields.")
 
         return parser
 
     def take_action(self, parsed_args):
+        from ironic_inspector_client import resource as res
 
         client = self.app.client_manager.baremetal_introspection
 
@@ -11,10 +11,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextlib
+import io
 import json
+import logging
 import os
+import subprocess
 import sys
-import tempfile
+import time
 import unittest
 from unittest import mock
 
@@ -25,27 +29,94 @@ from ironic_inspector import process
 from ironic_inspector.test import functional
 from keystoneauth1 import session as ks_session
 from keystoneauth1 import token_endpoint
-from oslo_concurrency import processutils
+from openstackclient import shell as osc_shell
 
 import ironic_inspector_client as client
 from ironic_inspector_client import shell
 
 
-class TestV1PythonAPI(functional.Base):
+# While waiting for something to happen, poll the service first after
+# _MIN_POLL_INTERVAL, then at doubling intervals up to _MAX_POLL_INTERVAL
+_MIN_POLL_INTERVAL = 0.01
+_MAX_POLL_INTERVAL = 0.2
+# Expected arguments of the port creation call, in addition to node_uuid
+_PORT_CREATE_KW = {'address': '11:22:33:44:55:66', 'is_pxe_enabled': True,
+                   'extra': {}}
+
+_SERVER = contextlib.ExitStack()
+
+
+def setUpModule():
+    # Start the service once for all tests, whichever runner is used
+    _SERVER.enter_context(functional.mocked_server())
+
+
+def tearDownModule():
+    _SERVER.close()
+
+
+class Base(functional.Base):
+    def wait_until(self, predicate, description=None,
+                   timeout=functional.DEFAULT_SLEEP * 10):
+        """Wait until predicate() returns a true value.
+
+        Unlike a fixed sleep, returns as soon as the condition is met.
+
+        :param description: callable returning what is being waited for,
+            used in the failure message if the timeout is reached.
+        """
+        deadline = time.monotonic() + timeout
+        delay = _MIN_POLL_INTERVAL
+        while not predicate():
+            if time.monotonic() >= deadline:
+                self.fail('Timed out after %s seconds waiting for %s'
+                          % (timeout, description() if description
+                             else predicate))
+            eventlet.greenthread.sleep(delay)
+            delay = min(delay * 2, _MAX_POLL_INTERVAL)
+
+    @property
+    def port_create_call(self):
+        """Expected call creating the port of the node under test."""
+        return mock.call(node_uuid=self.uuid, **_PORT_CREATE_KW)
+
+    def wait_for_state(self, state):
+        """Wait until the node under test reaches the given state."""
+        status = {}
+
+        def reached():
+            status.update(self.call_get_status(self.uuid))
+            return status['state'] == state
+
+        self.wait_until(
+            reached,
+            lambda: 'node %s to reach state %s, last seen state is %s'
+            % (self.uuid, state, status.get('state')))
+
+
+class TestV1PythonAPI(Base):
+    @classmethod
+    def setUpClass(cls):
+        super(TestV1PythonAPI, cls).setUpClass()
+        # The client itself keeps no state between tests, so it can be
+        # shared; the negotiated API versions are reset in setUp
+        cls.auth = token_endpoint.Token(endpoint='http://127.0.0.1:5050',
+                                        token='token')
+        cls.session = ks_session.Session(cls.auth)
+        cls.client = client.ClientV1(session=cls.session)
+
     def setUp(self):
         super(TestV1PythonAPI, self).setUp()
-        self.auth = token_endpoint.Token(endpoint='http://127.0.0.1:5050',
-                                         token='token')
-        self.session = ks_session.Session(self.auth)
-        self.client = client.ClientV1(session=self.session)
+        # Every test starts a fresh service, its versions must be probed
+        client.clear_version_cache()
 
     def my_status_index(self, statuses):
-        my_status = self._fake_status()
-        return statuses.index(my_status)
+        return next(index for index, status in enumerate(statuses)
+                    if status['uuid'] == self.uuid)
 
     def test_introspect_get_status(self):
         self.client.introspect(self.uuid)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
+        self.wait_for_state(istate.States.waiting)
         self.cli.set_node_power_state.assert_called_once_with(self.uuid,
                                                               'rebooting')
 
@@ -54,19 +125,18 @@ class TestV1PythonAPI(functional.Base):
 
         res = self.call_continue(self.data)
         self.assertEqual({'uuid': self.uuid}, res)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
-
-        self.assertCalledWithPatch(self.patch, self.cli.patch_node)
-        self.cli.create_port.assert_called_once_with(
-            node_uuid=self.uuid, address='11:22:33:44:55:66',
-            is_pxe_enabled=True, extra={})
+        self.wait_for_state(istate.States.finished)
 
         status = self.client.get_status(self.uuid)
         self.check_status(status, finished=True, state=istate.States.finished)
 
+        self.assertCalledWithPatch(self.patch, self.cli.patch_node)
+        self.assertEqual([self.port_create_call],
+                         self.cli.create_port.call_args_list)
+
     def test_introspect_list_statuses(self):
         self.client.introspect(self.uuid)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
+        self.wait_for_state(istate.States.waiting)
         self.cli.set_node_power_state.assert_called_once_with(self.uuid,
                                                               'rebooting')
 
@@ -77,54 +147,49 @@ class TestV1PythonAPI(functional.Base):
 
         res = self.call_continue(self.data)
         self.assertEqual({'uuid': self.uuid}, res)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
-
-        self.assertCalledWithPatch(self.patch, self.cli.patch_node)
-        self.cli.create_port.assert_called_once_with(
-            node_uuid=self.uuid, address='11:22:33:44:55:66',
-            is_pxe_enabled=True, extra={})
+        self.wait_for_state(istate.States.finished)
 
         statuses = self.client.list_statuses()
         my_status = statuses[self.my_status_index(statuses)]
         self.check_status(my_status, finished=True,
                           state=istate.States.finished)
 
+        self.assertCalledWithPatch(self.patch, self.cli.patch_node)
+        self.assertEqual([self.port_create_call],
+                         self.cli.create_port.call_args_list)
+
     def test_wait_for_finish(self):
         shared = [0]  # mutable structure to hold number of retries
 
         def fake_waiter(delay):
+            # Never actually sleep: the data is processed synchronously
             shared[0] += 1
             if shared[0] == 2:
                 # On the second wait simulate data arriving
                 res = self.call_continue(self.data)
                 self.assertEqual({'uuid': self.uuid}, res)
-            elif shared[0] > 2:
-                # Just wait afterwards
-                eventlet.greenthread.sleep(delay)
 
         self.client.introspect(self.uuid)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
+        self.wait_for_state(istate.States.waiting)
 
         status = self.client.get_status(self.uuid)
         self.check_status(status, finished=False, state=istate.States.waiting)
 
         self.client.wait_for_finish([self.uuid], sleep_function=fake_waiter,
-                                    retry_interval=functional.DEFAULT_SLEEP)
+                                    retry_interval=0)
 
         status = self.client.get_status(self.uuid)
         self.check_status(status, finished=True, state=istate.States.finished)
 
     def test_reprocess_stored_introspection_data(self):
-        port_create_call = mock.call(node_uuid=self.uuid,
-                                     address='11:22:33:44:55:66',
-                                     is_pxe_enabled=True, extra={})
+        port_create_call = self.port_create_call
 
         # assert reprocessing doesn't work before introspection
         self.assertRaises(client.ClientError, self.client.reprocess,
                           self.uuid)
 
         self.client.introspect(self.uuid)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
+        self.wait_for_state(istate.States.waiting)
         self.cli.set_node_power_state.assert_called_once_with(self.uuid,
                                                               'rebooting')
         status = self.client.get_status(self.uuid)
@@ -132,7 +197,7 @@ class TestV1PythonAPI(functional.Base):
 
         res = self.call_continue(self.data)
         self.assertEqual({'uuid': self.uuid}, res)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
+        self.wait_for_state(istate.States.finished)
 
         status = self.client.get_status(self.uuid)
         self.check_status(status, finished=True, state=istate.States.finished)
@@ -142,7 +207,9 @@ class TestV1PythonAPI(functional.Base):
         res = self.client.reprocess(self.uuid)
         self.assertEqual(202, res.status_code)
         self.assertEqual('{}\n', res.text)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
+        self.wait_until(lambda: self.cli.create_port.call_count >= 2,
+                        lambda: 'two ports to be created, got %s'
+                        % self.cli.create_port.call_count)
         self.check_status(status, finished=True, state=istate.States.finished)
 
         self.cli.create_port.assert_has_calls([port_create_call,
@@ -160,7 +227,7 @@ class TestV1PythonAPI(functional.Base):
                           "2e31df61-84b1-5856-bfb6-6b5f2cd3dd11")
 
         self.client.introspect(self.uuid)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
+        self.wait_for_state(istate.States.waiting)
         self.cli.set_node_power_state.assert_called_once_with(self.uuid,
                                                               'rebooting')
 
@@ -168,7 +235,7 @@ class TestV1PythonAPI(functional.Base):
         self.check_status(status, finished=False, state=istate.States.waiting)
 
         res = self.client.abort(self.uuid)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
+        self.wait_for_state(istate.States.error)
 
         self.assertEqual(202, res.status_code)
         self.assertEqual('{}\n', res.text)
@@ -194,19 +261,17 @@ class TestV1PythonAPI(functional.Base):
                           client.ClientV1, session=self.session,
                           api_version=2)
 
-        self.assertTrue(client.ClientV1(
-            api_version=1, session=self.session).server_api_versions())
-        self.assertTrue(client.ClientV1(
-            api_version='1.0', session=self.session).server_api_versions())
-        self.assertTrue(client.ClientV1(
-            api_version=(1, 0), session=self.session).server_api_versions())
-
-        self.assertTrue(
-            client.ClientV1(inspector_url='http://127.0.0.1:5050')
-            .server_api_versions())
-        self.assertTrue(
-            client.ClientV1(inspector_url='http://127.0.0.1:5050/v1')
-            .server_api_versions())
+        cases = [
+            {'api_version': 1, 'session': self.session},
+            {'api_version': '1.0', 'session': self.session},
+            {'api_version': (1, 0), 'session': self.session},
+            {'inspector_url': 'http://127.0.0.1:5050'},
+            {'inspector_url': 'http://127.0.0.1:5050/v1'},
+        ]
+        for kwargs in cases:
+            with self.subTest(**kwargs):
+                self.assertTrue(
+                    client.ClientV1(**kwargs).server_api_versions())
 
     def test_rules_api(self):
         res = self.client.rules.get_all()
@@ -236,10 +301,14 @@ class TestV1PythonAPI(functional.Base):
         res = self.client.rules.get_all()
         self.assertEqual([], res)
 
-        for _ in range(3):
-            res = self.client.rules.create(conditions=rule['conditions'],
-                                           actions=rule['actions'],
-                                           description=rule['description'])
+        def create_rule(_index):
+            return self.client.rules.create(conditions=rule['conditions'],
+                                            actions=rule['actions'],
+                                            description=rule['description'])
+
+        # The order in which the rules are created does not matter here
+        pool = eventlet.GreenPool(3)
+        for res in pool.imap(create_rule, range(3)):
             self.assertTrue(res['uuid'])
             for key in ('conditions', 'actions', 'description'):
                 self.assertEqual(rule[key], res[key])
@@ -257,34 +326,78 @@ class TestV1PythonAPI(functional.Base):
                           self.uuid)
 
 
-BASE_CMD = [os.path.join(sys.prefix, 'bin', 'openstack'),
-            '--os-auth-type', 'none', '--os-endpoint', 'http://127.0.0.1:5050']
+BASE_CMD = (os.path.join(sys.prefix, 'bin', 'openstack'),
+            '--os-auth-type', 'none', '--os-endpoint', 'http://127.0.0.1:5050')
+INTROSPECTION_CMD = ('baremetal', 'introspection')
+
+
+class BaseCLITest(Base):
+    def _execute_in_process(self, args, stdin=b''):
+        """Run the openstack CLI in this process.
 
+        Avoids paying for the interpreter start up and the plugin discovery
+        on every call.
 
-class BaseCLITest(functional.Base):
-    def openstack(self, cmd, expect_error=False, parse_json=False):
+        :return: tuple (exit code, stdout, stderr)
+        """
+        stdin = io.TextIOWrapper(io.BytesIO(stdin))
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        root_logger = logging.getLogger()
+        handlers = root_logger.handlers[:]
+        level = root_logger.level
+        try:
+            # The service's database migrations configure logging with
+            # disable_existing_loggers, which silences the logger used to
+            # report command errors unless it is re-enabled.
+            with mock.patch.object(sys, 'stdin', stdin), \
+                    mock.patch.object(sys, 'stdout', stdout), \
+                    mock.patch.object(sys, 'stderr', stderr), \
+                    mock.patch.object(osc_shell.OpenStackShell.LOG,
+                                      'disabled', False):
+                try:
+                    code = osc_shell.OpenStackShell().run(args)
+                except SystemExit as exc:
+                    code = exc.code
+        finally:
+            # Each run configures the root logger for its own stderr and
+            # verbosity, which must not leak into the next run
+            root_logger.handlers[:] = handlers
+            root_logger.setLevel(level)
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def openstack(self, cmd, expect_error=False, parse_json=False,
+                  in_process=True, stdin=b''):
         real_cmd = BASE_CMD + cmd
         if parse_json:
-            real_cmd += ['-f', 'json']
-        try:
-            out, _err = processutils.execute(*real_cmd)
-        except processutils.ProcessExecutionError as exc:
-            if expect_error:
-                return exc.stderr
-            else:
-                raise
+            real_cmd += ('-f', 'json')
+        if in_process:
+            code, out, err = self._execute_in_process(list(real_cmd[1:]),
+                                                      stdin=stdin)
         else:
+            # The executable path is absolute, so no PATH lookup is needed,
+            # and not closing file descriptors allows using posix_spawn.
+            proc = subprocess.run(real_cmd, input=stdin, capture_output=True,
+                                  close_fds=False)
+            code = proc.returncode
+            out = proc.stdout.decode('utf-8')
+            err = proc.stderr.decode('utf-8')
+
+        if code:
             if expect_error:
-                raise AssertionError('Command %s returned unexpected success' %
-                                     cmd)
-            elif parse_json:
-                return json.loads(out)
-            else:
-                return out
+                return err
+            raise AssertionError('Command %s failed with code %s: %s' %
+                                 (cmd, code, err))
+        if expect_error:
+            raise AssertionError('Command %s returned unexpected success' %
+                                 cmd)
+        elif parse_json:
+            return json.loads(out)
+        else:
+            return out
 
     def run_cli(self, *cmd, **kwargs):
-        return self.openstack(['baremetal', 'introspection'] + list(cmd),
-                              **kwargs)
+        return self.openstack(INTROSPECTION_CMD + cmd, **kwargs)
 
 
 class TestCLI(BaseCLITest):
@@ -313,14 +426,14 @@ class TestCLI(BaseCLITest):
         }
 
         self.data['all_interfaces'] = self.all_interfaces
+        self.data_json = json.dumps(self.data)
 
     def _fake_status(self, **kwargs):
         # to remove the hidden fields
         hidden_status_items = shell.StatusCommand.hidden_status_items
         fake_status = super(TestCLI, self)._fake_status(**kwargs)
-        fake_status = dict(item for item in fake_status.items()
-                           if item[0] not in hidden_status_items)
-        return fake_status
+        return {key: value for key, value in fake_status.items()
+                if key not in hidden_status_items}
 
     def test_cli_negative(self):
         msg_missing_param = 'the following arguments are required'
@@ -338,7 +451,7 @@ class TestCLI(BaseCLITest):
 
     def test_introspect_get_status(self):
         self.run_cli('start', self.uuid)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
+        self.wait_for_state(istate.States.waiting)
         self.cli.set_node_power_state.assert_called_once_with(self.uuid,
                                                               'rebooting')
 
@@ -347,18 +460,18 @@ class TestCLI(BaseCLITest):
 
         res = self.call_continue(self.data)
         self.assertEqual({'uuid': self.uuid}, res)
-        eventlet.greenthread.sleep(functional.DEFAULT_SLEEP)
-
-        self.assertCalledWithPatch(self.patch, self.cli.patch_node)
-        self.cli.create_port.assert_called_once_with(
-            node_uuid=self.uuid, address='11:22:33:44:55:66',
-            is_pxe_enabled=True, extra={})
+        self.wait_for_state(istate.States.finished)
 
         status = self.run_cli('status', self.uuid, parse_json=True)
         self.check_status(status, finished=True, state=istate.States.finished)
 
+        self.assertCalledWithPatch(self.patch, self.cli.patch_node)
+        self.assertEqual([self.port_create_call],
+                         self.cli.create_port.call_args_list)
+
     def test_rules_api(self):
-        res = self.run_cli('rule', 'list', parse_json=True)
+        # Make sure the installed entry point works as well
+        res = self.run_cli('rule', 'list', parse_json=True, in_process=False)
         self.assertEqual([], res)
 
         rule = {'conditions': [],
@@ -366,10 +479,8 @@ class TestCLI(BaseCLITest):
                 'description': 'Cool actions',
                 'scope': None,
                 'uuid': self.uuid}
-        with tempfile.NamedTemporaryFile(mode='w') as fp:
-            json.dump(rule, fp)
-            fp.flush()
-            res = self.run_cli('rule', 'import', fp.name, parse_json=True)
+        res = self.run_cli('rule', 'import', '-', parse_json=True,
+                           stdin=json.dumps(rule).encode('utf-8'))
 
         self.assertEqual([{'UUID': self.uuid,
                            'Description': 'Cool actions'}],
@@ -387,11 +498,9 @@ class TestCLI(BaseCLITest):
         res = self.run_cli('rule', 'list', parse_json=True)
         self.assertEqual([], res)
 
-        with tempfile.NamedTemporaryFile(mode='w') as fp:
-            rule.pop('uuid')
-            json.dump([rule, rule], fp)
-            fp.flush()
-            res = self.run_cli('rule', 'import', fp.name, parse_json=True)
+        rule.pop('uuid')
+        res = self.run_cli('rule', 'import', '-', parse_json=True,
+                           stdin=json.dumps([rule, rule]).encode('utf-8'))
 
         self.run_cli('rule', 'purge')
         res = self.run_cli('rule', 'list', parse_json=True)
@@ -400,7 +509,7 @@ class TestCLI(BaseCLITest):
     @mock.patch.object(process, 'get_introspection_data', autospec=True)
     def test_interface_list(self, get_mock):
         self.setup_lldp()
-        get_mock.return_value = json.dumps(self.data)
+        get_mock.return_value = self.data_json
 
         expected_eth1 = {u'Interface': u'eth1',
                          u'MAC Address': u'11:22:33:44:55:66',
@@ -433,7 +542,7 @@ class TestCLI(BaseCLITest):
     @mock.patch.object(process, 'get_introspection_data', autospec=True)
     def test_interface_show(self, get_mock):
         self.setup_lldp()
-        get_mock.return_value = json.dumps(self.data)
+        get_mock.return_value = self.data_json
 
         res = self.run_cli('interface', 'show', self.uuid, "eth1",
                            parse_json=True)
@@ -450,7 +559,8 @@ class TestCLI(BaseCLITest):
                                            {u'id': 201, u'name': u'vlan201'},
                                            {u'id': 203, u'name': u'vlan203'}]}
 
-        self.assertLessEqual(expected.items(), res.items())
+        for key, value in expected.items():
+            self.assertEqual(value, res.get(key), key)
 
 
 if __name__ == '__main__':
@@ -459,5 +569,4 @@ if __name__ == '__main__':
     else:
         test_name = None
 
-    with functional.mocked_server():
-        unittest.main(verbosity=2, defaultTest=test_name)
+    unittest.main(verbosity=2, defaultTest=test_name)
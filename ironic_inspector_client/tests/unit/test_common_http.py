@@ -19,6 +19,7 @@ from keystoneauth1 import exceptions
 from keystoneauth1 import session
 
 from ironic_inspector_client.common import http
+from ironic_inspector_client.common import jsonutils
 
 
 class TestCheckVersion(unittest.TestCase):
@@ -31,6 +32,9 @@ class TestCheckVersion(unittest.TestCase):
     def test_tuple(self):
         self.assertEqual((1, 0), self._check((1, 0)))
 
+    def test_list(self):
+        self.assertEqual((1, 2), self._check([1, 2]))
+
     def test_small_tuple(self):
         self.assertEqual((1, 0), self._check((1,)))
 
@@ -40,18 +44,38 @@ class TestCheckVersion(unittest.TestCase):
     def test_str(self):
         self.assertEqual((1, 0), self._check("1.0"))
 
+    def test_str_whitespace(self):
+        self.assertEqual((1, 0), self._check(" 1.0\n"))
+
+    def test_str_major_only(self):
+        self.assertEqual((1, 0), self._check("1"))
+
     def test_invalid_tuple(self):
         self.assertRaises(TypeError, self._check, (1, "x"))
+        self.assertRaises(TypeError, self._check, ("x",))
         self.assertRaises(ValueError, self._check, (1, 2, 3))
+        self.assertRaises(ValueError, self._check, ())
 
     def test_invalid_str(self):
         self.assertRaises(ValueError, self._check, "a.b")
         self.assertRaises(ValueError, self._check, "1.2.3")
         self.assertRaises(ValueError, self._check, "foo")
+        self.assertRaises(ValueError, self._check, "1.")
+        self.assertRaises(ValueError, self._check, "1. 0")
 
     def test_unsupported(self):
         self.assertRaises(http.VersionNotSupported, self._check, (99, 42))
 
+    @mock.patch.object(http.BaseClient, 'server_api_versions', autospec=True)
+    def test_base_version_not_checked(self, mock_versions):
+        mock_versions.return_value = ((1, 0), (1, 99))
+        cli = http.BaseClient(1, inspector_url='http://127.0.0.1:5050')
+        self.assertEqual((1, 0), cli._check_api_version((1, 0)))
+        self.assertFalse(mock_versions.called)
+
+        self.assertEqual((1, 2), cli._check_api_version((1, 2)))
+        mock_versions.assert_called_once_with(cli)
+
 
 FAKE_HEADERS = {
     http._MIN_VERSION_HEADER: '1.0',
@@ -59,25 +83,30 @@ FAKE_HEADERS = {
 }
 
 
-@mock.patch.object(session.Session, 'get', autospec=True,
+@mock.patch.object(session.Session, 'head', autospec=True,
                    **{'return_value.status_code': 200,
                       'return_value.headers': FAKE_HEADERS})
 class TestServerApiVersions(unittest.TestCase):
+    def setUp(self):
+        super(TestServerApiVersions, self).setUp()
+        http.clear_version_cache()
+        self.addCleanup(http.clear_version_cache)
+
     def _check(self, current=1):
         return http.BaseClient(
             api_version=current,
             inspector_url='http://127.0.0.1:5050').server_api_versions()
 
-    def test_no_headers(self, mock_get):
-        mock_get.return_value.headers = {}
+    def test_no_headers(self, mock_head):
+        mock_head.return_value.headers = {}
 
         minv, maxv = self._check()
 
         self.assertEqual((1, 0), minv)
         self.assertEqual((1, 0), maxv)
 
-    def test_with_headers(self, mock_get):
-        mock_get.return_value.headers = {
+    def test_with_headers(self, mock_head):
+        mock_head.return_value.headers = {
             'X-OpenStack-Ironic-Inspector-API-Minimum-Version': '1.1',
             'X-OpenStack-Ironic-Inspector-API-Maximum-Version': '1.42',
         }
@@ -87,29 +116,86 @@ class TestServerApiVersions(unittest.TestCase):
         self.assertEqual((1, 1), minv)
         self.assertEqual((1, 42), maxv)
 
-    def test_with_404(self, mock_get):
-        mock_get.return_value.status_code = 404
-        mock_get.return_value.headers = {}
+    def test_with_404(self, mock_head):
+        mock_head.return_value.status_code = 404
+        mock_head.return_value.headers = {}
 
         minv, maxv = self._check()
 
         self.assertEqual((1, 0), minv)
         self.assertEqual((1, 0), maxv)
 
-    def test_with_other_error(self, mock_get):
-        mock_get.return_value.status_code = 500
-        mock_get.return_value.headers = {}
+    def test_with_other_error(self, mock_head):
+        mock_head.return_value.status_code = 500
+        mock_head.return_value.headers = {}
 
         self.assertRaises(http.ClientError, self._check)
 
+    def test_cached(self, mock_head):
+        cli = http.BaseClient(api_version=1,
+                              inspector_url='http://127.0.0.1:5050')
+        mock_head.reset_mock()
+
+        self.assertEqual(((1, 0), (1, 9)), cli.server_api_versions())
+        self.assertEqual(((1, 0), (1, 9)), cli.server_api_versions())
+
+        mock_head.assert_called_once_with(mock.ANY,
+                                          'http://127.0.0.1:5050/v1',
+                                          authenticated=False,
+                                          raise_exc=False)
+
+    def test_cached_after_construction(self, mock_head):
+        cli = http.BaseClient(api_version=(1, 2),
+                              inspector_url='http://127.0.0.1:5050')
+        cli.server_api_versions()
+
+        mock_head.assert_called_once_with(mock.ANY,
+                                          'http://127.0.0.1:5050',
+                                          authenticated=False,
+                                          raise_exc=False)
+        self.assertEqual(['http://127.0.0.1:5050/v1'],
+                         list(http._VERSION_CACHE))
+
+    def test_cache_cleared(self, mock_head):
+        cli = http.BaseClient(api_version=1,
+                              inspector_url='http://127.0.0.1:5050')
+        cli.server_api_versions()
+        mock_head.reset_mock()
+
+        http.clear_version_cache()
+        cli.server_api_versions()
+
+        self.assertEqual(1, mock_head.call_count)
+
+    @mock.patch.object(http.time, 'monotonic', autospec=True)
+    def test_cache_expired(self, mock_time, mock_head):
+        mock_time.return_value = 1000
+        cli = http.BaseClient(api_version=1,
+                              inspector_url='http://127.0.0.1:5050')
+        cli.server_api_versions()
+        mock_head.reset_mock()
+
+        mock_time.return_value = 1000 + http._VERSION_CACHE_TTL + 1
+        cli.server_api_versions()
+
+        self.assertEqual(1, mock_head.call_count)
+
 
 class TestRequest(unittest.TestCase):
     base_url = 'http://127.0.0.1:5050/v1'
 
+    @classmethod
+    def setUpClass(cls):
+        super(TestRequest, cls).setUpClass()
+        # Building a mock with a spec inspects the whole class, do it once.
+        # reset_mock() in setUp only resets child mocks, return values and
+        # side effects, so tests must not assign plain attributes on it.
+        cls.session = mock.Mock(spec=session.Session)
+
     def setUp(self):
         super(TestRequest, self).setUp()
         self.headers = {http._VERSION_HEADER: '1.0'}
-        self.session = mock.Mock(spec=session.Session)
+        self.session.reset_mock(return_value=True, side_effect=True)
         self.session.get_endpoint.return_value = self.base_url
         self.req = self.session.request
         self.req.return_value.status_code = 200
@@ -161,6 +247,14 @@ class TestRequest(unittest.TestCase):
                                          'http://some/host/v1/foo/bar', 'get',
                                          raise_exc=False, headers=self.headers)
 
+    def test_no_auth_session_shared(self):
+        cli1 = self.get_client(use_session=False,
+                               inspector_url='http://some/host')
+        cli2 = self.get_client(use_session=False,
+                               inspector_url='http://other/host')
+        self.assertIsInstance(cli1._session, session.Session)
+        self.assertIs(cli1._session, cli2._session)
+
     def test_ok_with_session_and_url(self):
         res = self.get_client(
             use_session=True,
@@ -178,6 +272,20 @@ class TestRequest(unittest.TestCase):
         self.req.assert_called_once_with(self.base_url + '/foo/bar', 'get',
                                          raise_exc=False, headers=self.headers)
 
+    def test_extra_headers(self):
+        extra = {'X-Foo': 'bar'}
+        cli = self.get_client()
+        cli.request('get', '/foo/bar', headers=extra)
+        cli.request('get', '/foo/bar')
+
+        self.assertEqual({'X-Foo': 'bar'}, extra)
+        self.req.assert_has_calls([
+            mock.call(self.base_url + '/foo/bar', 'get', raise_exc=False,
+                      headers=dict(self.headers, **extra)),
+            mock.call(self.base_url + '/foo/bar', 'get', raise_exc=False,
+                      headers=self.headers),
+        ])
+
     def test_error(self):
         self.req.return_value.status_code = 400
         self.req.return_value.content = json.dumps(
@@ -186,6 +294,35 @@ class TestRequest(unittest.TestCase):
         self.assertRaisesRegex(http.ClientError, 'boom',
                                self.get_client().request, 'get', 'url')
 
+    @mock.patch.object(jsonutils, 'orjson', None)
+    def test_error_without_orjson(self):
+        self.req.return_value.status_code = 400
+        self.req.return_value.content = json.dumps(
+            {'error': {'message': 'boom'}}).encode('utf-8')
+
+        self.assertRaisesRegex(http.ClientError, 'boom',
+                               self.get_client().request, 'get', 'url')
+
+    @mock.patch.object(jsonutils, 'orjson', spec_set=['loads'])
+    def test_error_with_orjson(self, mock_orjson):
+        mock_orjson.loads.return_value = {'error': {'message': 'boom'}}
+        self.req.return_value.status_code = 400
+        self.req.return_value.content = b'{"error": {"message": "boom"}}'
+
+        self.assertRaisesRegex(http.ClientError, 'boom',
+                               self.get_client().request, 'get', 'url')
+        mock_orjson.loads.assert_called_once_with(
+            b'{"error": {"message": "boom"}}')
+
+    @mock.patch.object(jsonutils, 'orjson', spec_set=['loads'])
+    def test_error_discoverd_style_with_orjson(self, mock_orjson):
+        mock_orjson.loads.side_effect = ValueError('not JSON')
+        self.req.return_value.status_code = 400
+        self.req.return_value.content = b'boom'
+
+        self.assertRaisesRegex(http.ClientError, 'boom',
+                               self.get_client().request, 'get', 'url')
+
     def test_error_discoverd_style(self):
         self.req.return_value.status_code = 400
         self.req.return_value.content = b'boom'
@@ -211,6 +348,34 @@ class TestRequest(unittest.TestCase):
         self.assertRaisesRegex(http.ClientError, 'hello',
                                self.get_client().request, 'get', 'url')
 
+    @mock.patch.object(http.LOG, 'debug', autospec=True)
+    def test_error_empty_body(self, mock_debug):
+        self.req.return_value.status_code = 502
+        self.req.return_value.content = b''
+        self.req.return_value.reason = 'Bad Gateway'
+
+        with self.assertRaises(http.ClientError) as ctx:
+            self.get_client().request('get', 'url')
+        self.assertEqual('Bad Gateway', str(ctx.exception))
+        self.assertNotIn(mock.call('Old style error response returned, '
+                                   'assuming ironic-discoverd'),
+                         mock_debug.call_args_list)
+
+    def test_error_empty_body_no_reason(self):
+        self.req.return_value.status_code = 502
+        self.req.return_value.content = b''
+        self.req.return_value.reason = None
+
+        self.assertRaisesRegex(http.ClientError, '^502$',
+                               self.get_client().request, 'get', 'url')
+
+    def test_error_not_utf8(self):
+        self.req.return_value.status_code = 400
+        self.req.return_value.content = b'boom \xff'
+
+        self.assertRaisesRegex(http.ClientError, 'boom',
+                               self.get_client().request, 'get', 'url')
+
     def test_error_non_sense2(self):
         self.req.return_value.status_code = 400
         self.req.return_value.content = b'42'
@@ -11,8 +11,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import importlib
+import sys
 import types
 import unittest
+from unittest import mock
 
 import ironic_inspector_client
 
@@ -25,5 +28,20 @@ class TestExposedAPI(unittest.TestCase):
                                       types.ModuleType)}
         self.assertEqual({'ClientV1', 'ClientError', 'EndpointNotFound',
                           'VersionNotSupported',
-                          'MAX_API_VERSION', 'DEFAULT_API_VERSION'},
+                          'MAX_API_VERSION', 'DEFAULT_API_VERSION',
+                          'clear_version_cache'},
                          exposed)
+
+    @mock.patch.dict(sys.modules)
+    def test_submodules_reachable(self):
+        for name in list(sys.modules):
+            if name.split('.')[0] == 'ironic_inspector_client':
+                del sys.modules[name]
+
+        fresh = importlib.import_module('ironic_inspector_client')
+
+        self.assertIsNot(ironic_inspector_client, fresh)
+        self.assertTrue(issubclass(fresh.v1.WaitTimeoutError, Exception))
+        self.assertTrue(fresh.v1.RulesAPI)
+        self.assertTrue(fresh.common.http.BaseClient)
+        self.assertRaises(AttributeError, getattr, fresh, 'nonexistent')
@@ -13,6 +13,7 @@
 
 import collections
 import io
+import os
 import sys
 import tempfile
 from unittest import mock
@@ -53,19 +54,24 @@ class TestIntrospect(BaseTest):
         cmd.take_action(parsed_args)
 
         calls = [mock.call(node) for node in arglist]
-        self.assertEqual(calls, self.client.introspect.call_args_list)
+        self.assertCountEqual(calls, self.client.introspect.call_args_list)
 
     def test_introspect_many_fails(self):
         arglist = ['uuid1', 'uuid2', 'uuid3']
         verifylist = [('node', arglist)]
-        self.client.introspect.side_effect = (None, RuntimeError())
+
+        def _introspect(node):
+            if node == 'uuid2':
+                raise RuntimeError()
+
+        self.client.introspect.side_effect = _introspect
 
         cmd = shell.StartCommand(self.app, None)
         parsed_args = self.check_parser(cmd, arglist, verifylist)
         self.assertRaises(RuntimeError, cmd.take_action, parsed_args)
 
-        calls = [mock.call(node) for node in arglist[:2]]
-        self.assertEqual(calls, self.client.introspect.call_args_list)
+        calls = [mock.call(node) for node in arglist]
+        self.assertCountEqual(calls, self.client.introspect.call_args_list)
 
     def test_reprocess(self):
         node = 'uuid1'
@@ -97,7 +103,7 @@ class TestIntrospect(BaseTest):
         _c, values = cmd.take_action(parsed_args)
 
         calls = [mock.call(node) for node in nodes]
-        self.assertEqual(calls, self.client.introspect.call_args_list)
+        self.assertCountEqual(calls, self.client.introspect.call_args_list)
         self.assertEqual([('uuid1', None), ('uuid2', 'boom'), ('uuid3', None)],
                          sorted(values))
 
@@ -116,7 +122,7 @@ class TestIntrospect(BaseTest):
         _c, values = cmd.take_action(parsed_args)
 
         calls = [mock.call(node) for node in nodes]
-        self.assertEqual(calls, self.client.introspect.call_args_list)
+        self.assertCountEqual(calls, self.client.introspect.call_args_list)
         self.assertEqual([('uuid1', None), ('uuid2', None), ('uuid3', None)],
                          sorted(values))
 
@@ -178,9 +184,20 @@ class TestGetStatus(BaseTest):
         parsed_args = self.check_parser(cmd, arglist, verifylist)
         result = cmd.take_action(parsed_args)
 
-        self.assertEqual([('error', 'finished'), ('boom', True)], list(result))
+        self.assertEqual((('error', 'finished'), ('boom', True)), result)
         self.client.get_status.assert_called_once_with('uuid1')
 
+    def test_status_only_hidden(self):
+        arglist = ['uuid1']
+        verifylist = [('node', 'uuid1')]
+        self.client.get_status.return_value = {'links': []}
+
+        cmd = shell.StatusCommand(self.app, None)
+        parsed_args = self.check_parser(cmd, arglist, verifylist)
+        result = cmd.take_action(parsed_args)
+
+        self.assertEqual(((), ()), result)
+
 
 class TestStatusList(BaseTest):
     def setUp(self):
@@ -217,21 +234,26 @@ class TestStatusList(BaseTest):
         verifylist = []
         cmd = shell.StatusListCommand(self.app, None)
         parsed_args = self.check_parser(cmd, arglist, verifylist)
-        result = cmd.take_action(parsed_args)
-        self.assertEqual((self.COLUMNS, [self.status_row(status)
-                                         for status in status_list]),
-                         result)
+        columns, rows = cmd.take_action(parsed_args)
+        self.assertEqual(self.COLUMNS, columns)
+        self.assertEqual([self.status_row(status) for status in status_list],
+                         list(rows))
         self.client.list_statuses.assert_called_once_with(limit=None,
                                                           marker=None)
 
+    def test_no_hidden_columns(self):
+        self.assertFalse(set(shell.StatusListCommand.MAPPING.values())
+                         & set(shell.StatusCommand.hidden_status_items))
+
     def test_list_statuses_marker_limit(self):
         self.client.list_statuses.return_value = []
         arglist = ['--marker', 'uuid1', '--limit', '42']
         verifylist = [('marker', 'uuid1'), ('limit', 42)]
         cmd = shell.StatusListCommand(self.app, None)
         parsed_args = self.check_parser(cmd, arglist, verifylist)
-        result = cmd.take_action(parsed_args)
-        self.assertEqual((self.COLUMNS, []), result)
+        columns, rows = cmd.take_action(parsed_args)
+        self.assertEqual(self.COLUMNS, columns)
+        self.assertEqual([], list(rows))
         self.client.list_statuses.assert_called_once_with(limit=42,
                                                           marker='uuid1')
 
@@ -306,6 +328,24 @@ class TestRules(BaseTest):
         self.rules_api.from_json.assert_any_call({'foo': 'bar'})
         self.rules_api.from_json.assert_any_call({'answer': 42})
 
+    def test_import_stdin(self):
+        stdin = io.TextIOWrapper(io.BytesIO(b'[{"foo": "bar"}]'))
+
+        arglist = ['-']
+        verifylist = [('file', '-')]
+
+        self.rules_api.from_json.return_value = {
+            'uuid': '1', 'description': 'd', 'links': []}
+
+        cmd = shell.RuleImportCommand(self.app, None)
+        parsed_args = self.check_parser(cmd, arglist, verifylist)
+        with mock.patch.object(sys, 'stdin', stdin):
+            cols, values = cmd.take_action(parsed_args)
+
+        self.assertEqual(('UUID', 'Description'), cols)
+        self.assertEqual([('1', 'd')], values)
+        self.rules_api.from_json.assert_called_once_with({'foo': 'bar'})
+
     def test_list(self):
         self.rules_api.get_all.return_value = [
             {'uuid': '1', 'description': 'd1', 'links': []},
@@ -390,7 +430,9 @@ class TestDataSave(BaseTest):
                                                      processed=False)
 
     def test_file(self):
-        self.client.get_data.return_value = b'{"answer": 42}'
+        self.client.get_data.return_value = mock.MagicMock()
+        self.client.get_data.return_value.__iter__.return_value = [
+            b'{"answer": ', b'42}']
 
         with tempfile.NamedTemporaryFile() as fp:
             arglist = ['--file', fp.name, 'uuid1']
@@ -404,7 +446,24 @@ class TestDataSave(BaseTest):
 
         self.assertEqual(b'{"answer": 42}', content)
         self.client.get_data.assert_called_once_with('uuid1', raw=True,
-                                                     processed=True)
+                                                     processed=True,
+                                                     stream=True)
+        self.client.get_data.return_value.close.assert_called_once_with()
+
+    def test_file_open_fails(self):
+        data = self.client.get_data.return_value = mock.MagicMock()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'missing', 'data.json')
+            arglist = ['--file', path, 'uuid1']
+            verifylist = [('node', 'uuid1'), ('file', path)]
+
+            cmd = shell.DataSaveCommand(self.app, None)
+            parsed_args = self.check_parser(cmd, arglist, verifylist)
+            self.assertRaises(FileNotFoundError, cmd.take_action, parsed_args)
+
+        data.close.assert_called_once_with()
+        data.__iter__.assert_not_called()
 
 
 class TestInterfaceCmds(BaseTest):
@@ -29,29 +29,38 @@ FAKE_HEADERS = {
 }
 
 
-@mock.patch.object(session.Session, 'get',
+@mock.patch.object(session.Session, 'head',
                    return_value=mock.Mock(headers=FAKE_HEADERS,
                                           status_code=200),
                    autospec=True)
 class TestInit(unittest.TestCase):
     my_ip = 'http://127.0.0.1:5050'
 
+    def setUp(self):
+        super(TestInit, self).setUp()
+        http.clear_version_cache()
+        self.addCleanup(http.clear_version_cache)
+
     def get_client(self, **kwargs):
         kwargs.setdefault('inspector_url', self.my_ip)
         return ironic_inspector_client.ClientV1(**kwargs)
 
-    def test_ok(self, mock_get):
+    def test_ok(self, mock_head):
         self.get_client()
-        mock_get.assert_called_once_with(mock.ANY,
-                                         self.my_ip, authenticated=False,
-                                         raise_exc=False)
+        self.assertFalse(mock_head.called)
 
-    def test_explicit_version(self, mock_get):
+    def test_non_default_version(self, mock_head):
+        self.get_client(api_version=(1, 2))
+        mock_head.assert_called_once_with(mock.ANY,
+                                          self.my_ip, authenticated=False,
+                                          raise_exc=False)
+
+    def test_explicit_version(self, mock_head):
         self.get_client(api_version=(1, 2))
         self.get_client(api_version=1)
         self.get_client(api_version='1.3')
 
-    def test_unsupported_version(self, mock_get):
+    def test_unsupported_version(self, mock_head):
         self.assertRaises(ironic_inspector_client.VersionNotSupported,
                           self.get_client, api_version=(1, 99))
         self.assertRaises(ironic_inspector_client.VersionNotSupported,
@@ -59,12 +68,12 @@ class TestInit(unittest.TestCase):
         self.assertRaises(ironic_inspector_client.VersionNotSupported,
                           self.get_client, api_version='1.42')
 
-    def test_explicit_url(self, mock_get):
-        self.get_client(inspector_url='http://host:port')
-        mock_get.assert_called_once_with(mock.ANY,
-                                         'http://host:port',
-                                         authenticated=False,
-                                         raise_exc=False)
+    def test_explicit_url(self, mock_head):
+        self.get_client(inspector_url='http://host:port', api_version=(1, 2))
+        mock_head.assert_called_once_with(mock.ANY,
+                                          'http://host:port',
+                                          authenticated=False,
+                                          raise_exc=False)
 
 
 class BaseTest(unittest.TestCase):
@@ -86,13 +95,13 @@ class TestIntrospect(BaseTest):
         self.get_client().introspect(self.uuid)
         mock_req.assert_called_once_with(
             mock.ANY, 'post', '/introspection/%s' % self.uuid,
-            params={})
+            params=None)
 
     def test_deprecated_uuid(self, mock_req):
         self.get_client().introspect(uuid=self.uuid)
         mock_req.assert_called_once_with(
             mock.ANY, 'post', '/introspection/%s' % self.uuid,
-            params={})
+            params=None)
 
     def test_invalid_input(self, mock_req):
         self.assertRaises(TypeError, self.get_client().introspect, 42)
@@ -128,15 +137,16 @@ class TestReprocess(BaseTest):
 @mock.patch.object(http.BaseClient, 'request', autospec=True)
 class TestGetStatus(BaseTest):
     def test(self, mock_req):
-        mock_req.return_value.json.return_value = 'json'
+        mock_req.return_value.json.return_value = {'finished': True}
 
-        self.get_client().get_status(self.uuid)
+        res = self.get_client().get_status(self.uuid)
 
+        self.assertEqual({'finished': True}, res)
         mock_req.assert_called_once_with(
             mock.ANY, 'get', '/introspection/%s' % self.uuid)
 
     def test_deprecated_uuid(self, mock_req):
-        mock_req.return_value.json.return_value = 'json'
+        mock_req.return_value.json.return_value = {'finished': True}
 
         self.get_client().get_status(uuid=self.uuid)
 
@@ -147,6 +157,36 @@ class TestGetStatus(BaseTest):
         self.assertRaises(TypeError, self.get_client().get_status, 42)
 
 
+@mock.patch.object(ironic_inspector_client.ClientV1, 'get_status',
+                   autospec=True)
+class TestGetStatusMany(BaseTest):
+    def test(self, mock_get_st):
+        mock_get_st.side_effect = lambda self, node_id: {'uuid': node_id}
+        node_ids = ['uuid%d' % i for i in range(20)]
+
+        res = self.get_client().get_status_many(node_ids, max_workers=4)
+
+        self.assertEqual({node_id: {'uuid': node_id}
+                          for node_id in node_ids}, res)
+        self.assertEqual(20, mock_get_st.call_count)
+
+    def test_empty(self, mock_get_st):
+        self.assertEqual({}, self.get_client().get_status_many([]))
+        self.assertFalse(mock_get_st.called)
+
+    def test_error(self, mock_get_st):
+        mock_get_st.side_effect = http.ClientError(mock.Mock(content=b'boom'))
+
+        self.assertRaisesRegex(http.ClientError, 'boom',
+                               self.get_client().get_status_many,
+                               ['uuid1', 'uuid2'])
+
+    def test_invalid_input(self, mock_get_st):
+        self.assertRaises(TypeError, self.get_client().get_status_many,
+                          ['uuid1', 42])
+        self.assertFalse(mock_get_st.called)
+
+
 @mock.patch.object(http.BaseClient, 'request', autospec=True)
 class TestListStatuses(BaseTest):
     def test_default(self, mock_req):
@@ -182,6 +222,10 @@ class TestListStatuses(BaseTest):
                                self.get_client().list_statuses, limit='42')
 
 
+_STATUS_PENDING = {'finished': False, 'error': None}
+_STATUS_DONE = {'finished': True, 'error': None}
+
+
 @mock.patch.object(ironic_inspector_client.ClientV1, 'get_status',
                    autospec=True)
 class TestWaitForFinish(BaseTest):
@@ -190,33 +234,55 @@ class TestWaitForFinish(BaseTest):
         self.sleep = mock.Mock(spec=[])
 
     def test_ok(self, mock_get_st):
-        mock_get_st.side_effect = (
-            [{'finished': False, 'error': None}] * 5
-            + [{'finished': True, 'error': None}]
-        )
+        mock_get_st.side_effect = [_STATUS_PENDING] * 5 + [_STATUS_DONE]
 
         res = self.get_client().wait_for_finish(['uuid1'],
                                                 sleep_function=self.sleep)
-        self.assertEqual({'uuid1': {'finished': True, 'error': None}},
-                         res)
+        self.assertDictEqual({'uuid1': _STATUS_DONE}, res)
         self.sleep.assert_called_with(v1.DEFAULT_RETRY_INTERVAL)
         self.assertEqual(5, self.sleep.call_count)
 
+    @mock.patch.object(v1.random, 'uniform', autospec=True)
+    def test_backoff(self, mock_uniform, mock_get_st):
+        mock_uniform.side_effect = lambda low, high: high
+        mock_get_st.side_effect = [_STATUS_PENDING] * 5 + [_STATUS_DONE]
+
+        res = self.get_client().wait_for_finish(['uuid1'],
+                                                sleep_function=self.sleep,
+                                                retry_interval=1,
+                                                max_retry_interval=5)
+        self.assertDictEqual({'uuid1': _STATUS_DONE}, res)
+        self.assertEqual([mock.call(1), mock.call(2), mock.call(4),
+                          mock.call(5), mock.call(5)],
+                         self.sleep.call_args_list)
+        self.assertEqual([mock.call(0, 1), mock.call(0, 2), mock.call(0, 4),
+                          mock.call(0, 5), mock.call(0, 5)],
+                         mock_uniform.call_args_list)
+
+    @mock.patch.object(v1.random, 'uniform', autospec=True)
+    def test_backoff_long_wait(self, mock_uniform, mock_get_st):
+        mock_uniform.side_effect = lambda low, high: high
+        mock_get_st.return_value = _STATUS_PENDING
+
+        self.assertRaises(v1.WaitTimeoutError,
+                          self.get_client().wait_for_finish,
+                          ['uuid1'], sleep_function=self.sleep,
+                          retry_interval=0.5, max_retry_interval=5,
+                          max_retries=2000)
+        self.assertEqual(2000, self.sleep.call_count)
+        self.sleep.assert_called_with(5)
+
     def test_deprecated_uuids(self, mock_get_st):
-        mock_get_st.side_effect = (
-            [{'finished': False, 'error': None}] * 5
-            + [{'finished': True, 'error': None}]
-        )
+        mock_get_st.side_effect = [_STATUS_PENDING] * 5 + [_STATUS_DONE]
 
         res = self.get_client().wait_for_finish(uuids=['uuid1'],
                                                 sleep_function=self.sleep)
-        self.assertEqual({'uuid1': {'finished': True, 'error': None}},
-                         res)
+        self.assertDictEqual({'uuid1': _STATUS_DONE}, res)
         self.sleep.assert_called_with(v1.DEFAULT_RETRY_INTERVAL)
         self.assertEqual(5, self.sleep.call_count)
 
     def test_timeout(self, mock_get_st):
-        mock_get_st.return_value = {'finished': False, 'error': None}
+        mock_get_st.return_value = _STATUS_PENDING
 
         self.assertRaises(v1.WaitTimeoutError,
                           self.get_client().wait_for_finish,
@@ -227,23 +293,23 @@ class TestWaitForFinish(BaseTest):
     def test_multiple(self, mock_get_st):
         mock_get_st.side_effect = [
             # attempt 1
-            {'finished': False, 'error': None},
-            {'finished': False, 'error': None},
-            {'finished': False, 'error': None},
+            _STATUS_PENDING,
+            _STATUS_PENDING,
+            _STATUS_PENDING,
             # attempt 2
-            {'finished': True, 'error': None},
-            {'finished': False, 'error': None},
+            _STATUS_DONE,
+            _STATUS_PENDING,
             {'finished': True, 'error': 'boom'},
             # attempt 3 (only uuid2)
-            {'finished': True, 'error': None},
+            _STATUS_DONE,
         ]
 
         res = self.get_client().wait_for_finish(['uuid1', 'uuid2', 'uuid3'],
                                                 sleep_function=self.sleep)
-        self.assertEqual({'uuid1': {'finished': True, 'error': None},
-                          'uuid2': {'finished': True, 'error': None},
-                          'uuid3': {'finished': True, 'error': 'boom'}},
-                         res)
+        self.assertDictEqual({'uuid1': _STATUS_DONE,
+                              'uuid2': _STATUS_DONE,
+                              'uuid3': {'finished': True, 'error': 'boom'}},
+                             res)
         self.sleep.assert_called_with(v1.DEFAULT_RETRY_INTERVAL)
         self.assertEqual(2, self.sleep.call_count)
 
@@ -288,6 +354,25 @@ class TestGetData(BaseTest):
         mock_req.assert_called_once_with(
             mock.ANY, 'get', '/introspection/%s/data' % self.uuid)
 
+    def test_raw_stream(self, mock_req):
+        mock_req.return_value.iter_content.return_value = iter([b'js',
+                                                                b'on'])
+
+        res = self.get_client().get_data(self.uuid, raw=True, stream=True)
+
+        self.assertEqual([b'js', b'on'], list(res))
+        mock_req.assert_called_once_with(
+            mock.ANY, 'get', '/introspection/%s/data' % self.uuid,
+            stream=True)
+        mock_req.return_value.close.assert_called_once_with()
+
+    def test_raw_stream_closed_early(self, mock_req):
+        res = self.get_client().get_data(self.uuid, raw=True, stream=True)
+
+        res.close()
+
+        mock_req.return_value.close.assert_called_once_with()
+
     def test_invalid_input(self, _):
         self.assertRaises(TypeError, self.get_client().get_data, 42)
 
@@ -14,7 +14,9 @@
 """Client for V1 API."""
 
 import collections
+from concurrent import futures
 import logging
+import random
 import time
 import warnings
 
@@ -39,10 +41,40 @@ DEFAULT_RETRY_INTERVAL = 10
 to finish."""
 DEFAULT_MAX_RETRIES = 3600
 """Default number of retries when waiting for introspection to finish."""
+DEFAULT_MAX_WORKERS = 10
+"""Default number of concurrent requests for bulk operations."""
 
 LOG = logging.getLogger(__name__)
 
 
+_DATA_CHUNK_SIZE = 64 * 1024
+
+
+class _StreamedContent(object):
+    """Iterator over the chunks of a streamed response.
+
+    The response is closed once the iteration stops or fails, or when
+    close() is called, even if the iteration has not started.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self._chunks = response.iter_content(chunk_size=_DATA_CHUNK_SIZE)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        self._response.close()
+
+
 class WaitTimeoutError(Exception):
     """Timeout while waiting for nodes to finish introspection."""
 
@@ -62,9 +94,9 @@ class ClientV1(http.BaseClient):
     arguments ``service_type``, ``interface`` and ``region_name`` can be
     provided to modify how the URL is looked up.
 
-    If the catalog lookup fails, the local host with port 5050 is tried.
-    However, this behaviour is deprecated and should not be relied on.
-    Also an explicit ``inspector_url`` can be passed to bypass service catalog.
+    If the catalog lookup fails,
+    :py:class:`ironic_inspector_client.EndpointNotFound` is raised. An explicit
+    ``inspector_url`` can be passed to bypass service catalog.
 
     Optional ``api_version`` argument is a minimum API version that a server
     must support. It can be a tuple (MAJ, MIN), string "MAJ.MIN" or integer
@@ -120,11 +152,11 @@ class ClientV1(http.BaseClient):
         """
         node_id = self._check_parameters(node_id, uuid)
 
-        params = {}
+        params = None
         if manage_boot is not None:
-            params['manage_boot'] = str(int(manage_boot))
+            params = {'manage_boot': str(int(manage_boot))}
 
-        self.request('post', '/introspection/%s' % node_id, params=params)
+        self.request('post', f'/introspection/{node_id}', params=params)
 
     def reprocess(self, node_id=None, uuid=None):
         """Reprocess stored introspection data.
@@ -144,8 +176,7 @@ class ClientV1(http.BaseClient):
         node_id = self._check_parameters(node_id, uuid)
 
         return self.request('post',
-                            '/introspection/%s/data/unprocessed' %
-                            node_id)
+                            f'/introspection/{node_id}/data/unprocessed')
 
     def list_statuses(self, marker=None, limit=None):
         """List introspection statuses.
@@ -205,12 +236,38 @@ class ClientV1(http.BaseClient):
         """
         node_id = self._check_parameters(node_id, uuid)
 
-        return self.request('get', '/introspection/%s' % node_id).json()
+        return self.request('get', f'/introspection/{node_id}').json()
+
+    def get_status_many(self, node_ids, max_workers=DEFAULT_MAX_WORKERS):
+        """Get introspection statuses for several nodes in parallel.
+
+        :param node_ids: collection of node UUIDs or names
+        :param max_workers: maximum number of concurrent requests. Setting
+            it higher than the connection pool size of the session (10 by
+            default) does not make the requests any faster.
+        :raises: :py:class:`ironic_inspector_client.ClientError` on error
+            reported from a server
+        :raises: :py:class:`ironic_inspector_client.VersionNotSupported`
+            if requested api_version is not supported
+        :raises: *requests* library exception on connection problems.
+        :raises: TypeError if any of node_ids is not a string.
+        :return: dictionary node_id -> status (the same as in get_status).
+        """
+        node_ids = [self._check_parameters(node_id, None)
+                    for node_id in node_ids]
+        if not node_ids:
+            return {}
+
+        with futures.ThreadPoolExecutor(
+                max_workers=min(max_workers, len(node_ids))) as executor:
+            return dict(zip(node_ids,
+                            executor.map(self.get_status, node_ids)))
 
     def wait_for_finish(self, node_ids=None,
                         retry_interval=DEFAULT_RETRY_INTERVAL,
                         max_retries=DEFAULT_MAX_RETRIES,
-                        sleep_function=time.sleep, uuids=None):
+                        sleep_function=time.sleep, uuids=None,
+                        max_retry_interval=None):
         """Wait for introspection finishing for given nodes.
 
         :param uuids: collection of node UUIDs or names, deprecated
@@ -218,6 +275,10 @@ class ClientV1(http.BaseClient):
         :param retry_interval: sleep interval between retries.
         :param max_retries: maximum number of retries.
         :param sleep_function: function used for sleeping between retries.
+        :param max_retry_interval: if set, the sleep interval is doubled
+            after every retry up to this value and randomized (exponential
+            backoff with full jitter). By default retry_interval is always
+            used.
         :raises: :py:class:`ironic_inspector_client.WaitTimeoutError` on
             timeout
         :raises: :py:class:`ironic_inspector_client.ClientError` on error
@@ -236,6 +297,7 @@ class ClientV1(http.BaseClient):
         elif not node_ids:
             raise TypeError("The node_ids argument is required")
 
+        backoff = retry_interval
         # Number of attempts = number of retries + first attempt
         for attempt in range(max_retries + 1):
             new_active_node_ids = []
@@ -255,14 +317,22 @@ class ClientV1(http.BaseClient):
                               {'count': len(new_active_node_ids),
                                'attempt': attempt + 1,
                                'total': max_retries + 1})
-                    sleep_function(retry_interval)
+                    delay = retry_interval
+                    if max_retry_interval is not None:
+                        # Stop growing once the cap is reached, so that the
+                        # value never overflows on long waits
+                        backoff = min(max_retry_interval, backoff)
+                        delay = random.uniform(0, backoff)
+                        backoff *= 2
+                    sleep_function(delay)
             else:
                 return result
 
         raise WaitTimeoutError(_("Timeout while waiting for introspection "
                                  "of nodes %s") % new_active_node_ids)
 
-    def get_data(self, node_id=None, raw=False, uuid=None, processed=True):
+    def get_data(self, node_id=None, raw=False, uuid=None, processed=True,
+                 stream=False):
         """Get introspection data from the last introspection of a node.
 
         If swift support is disabled, introspection data won't be stored,
@@ -273,7 +343,12 @@ class ClientV1(http.BaseClient):
         :param raw: whether to return raw binary data or parsed JSON data
         :param processed: whether to return the final processed data or the
             raw unprocessed data received from the ramdisk.
-        :returns: bytes or a dict depending on the 'raw' argument
+        :param stream: only used with ``raw``, whether to return an iterator
+            over chunks of the raw data instead of reading it into memory
+            at once.
+        :returns: bytes, an iterator over bytes or a dict depending on the
+            'raw' and 'stream' arguments. The iterator has a close() method
+            to release the connection if it is not consumed to the end.
         :raises: :py:class:`ironic_inspector_client.ClientError` on error
             reported from a server
         :raises: :py:class:`ironic_inspector_client.VersionNotSupported` if
@@ -283,9 +358,13 @@ class ClientV1(http.BaseClient):
         """
         node_id = self._check_parameters(node_id, uuid)
 
-        url = ('/introspection/%s/data' if processed
-               else '/introspection/%s/data/unprocessed')
-        resp = self.request('get', url % node_id)
+        url = f'/introspection/{node_id}/data'
+        if not processed:
+            url += '/unprocessed'
+        if raw and stream:
+            return _StreamedContent(self.request('get', url, stream=True))
+
+        resp = self.request('get', url)
         if raw:
             return resp.content
         else:
@@ -305,7 +384,7 @@ class ClientV1(http.BaseClient):
         """
         node_id = self._check_parameters(node_id, uuid)
 
-        return self.request('post', '/introspection/%s/abort' % node_id)
+        return self.request('post', f'/introspection/{node_id}/abort')
 
     def get_interface_data(self, node_ident, interface, field_sel):
         """Get interface data for the input node and interface
@@ -464,7 +543,7 @@ class RulesAPI(object):
         if not isinstance(uuid, str):
             raise TypeError(
                 _("Expected string for uuid argument, got %r") % uuid)
-        return self._request('get', '/rules/%s' % uuid).json()
+        return self._request('get', f'/rules/{uuid}').json()
 
     def delete(self, uuid):
         """Delete an introspection rule.
@@ -478,7 +557,7 @@ class RulesAPI(object):
         if not isinstance(uuid, str):
             raise TypeError(
                 _("Expected string for uuid argument, got %r") % uuid)
-        self._request('delete', '/rules/%s' % uuid)
+        self._request('delete', f'/rules/{uuid}')
 
     def delete_all(self):
         """Delete all introspection rules.